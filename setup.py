@@ -14,6 +14,13 @@ def read(*paths, **kwargs):
     return content
 
 
+def read_requirements(path):
+    return [
+        line for line in read(path).splitlines()
+        if line and line[0] not in '"#-' and not line.startswith('git+')
+    ]
+
+
 setup(
     name="sms-activate-email",
     version=read("sms_activate_email", "VERSION"),
@@ -21,9 +28,12 @@ setup(
     long_description=read("README.md"),
     long_description_content_type="text/markdown",
     packages=find_packages(exclude=["tests", ".github"]),
-    install_requires=[
-        'setuptools~=68.2.0',
-        'requests~=2.31.0'
-    ],
+    install_requires=read_requirements("requirements.txt"),
+    extras_require={
+        'fast': ['orjson'],
+        'async': ['aiohttp'],
+        'persistent-cache': ['msgpack'],
+        'streaming': ['ijson']
+    },
     package_data={"sms_activate_email": ["VERSION"]}
 )
@@ -0,0 +1,133 @@
+import asyncio
+import typing
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from sms_activate_email.client import (
+    EmailDomain, EmailActivation, _parse_response, _parse_domains, _backoff_delay
+)
+from sms_activate_email.errors import SMSActivateError, WaitingForMessageError
+
+
+class AsyncSMSActivateEmailClient:
+    """
+    Represents an asyncio `sms-activate` API client for temporary mailboxes.
+
+    `get_text`, `reactivate` and `cancel` methods of activations got from this client are coroutines.
+    """
+    def __init__(self, api_key: str, base_url: str = 'https://api.sms-activate.org/stubs/handler_api.php'):
+        """
+        :param api_key: Your API key for SMS-Activate.
+        :param base_url: API base URL.
+        """
+        if aiohttp is None:
+            raise ImportError('aiohttp is required for AsyncSMSActivateEmailClient')
+
+        self._api_key = api_key
+        self._base_url = base_url
+
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the underlying HTTP session.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, params: dict) -> dict:
+        """
+        Performs an API request and checks the response for API errors.
+        :param params: Request query parameters, `None` values are skipped.
+        :return: Dictionary with response data.
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers={'User-Agent': 'python-sms-activate-email/0.1'}, raise_for_status=False
+            )
+        params = {key: value for key, value in params.items() if value is not None}
+        params['api_key'] = self._api_key
+        async with self._session.get(self._base_url, params=params) as response:
+            content = await response.read()
+        return _parse_response(response.status, content)
+
+    async def get_available_domains(self, from_domain: str) -> typing.Tuple[EmailDomain, ...]:
+        """
+        Get available domains for temporary mailbox.
+        :param from_domain: Domain from which you are expecting to receive an email.
+        :return: Tuple of available domains.
+        """
+        response_dict = await self._request({'action': 'getDomains', 'site': from_domain})
+        return _parse_domains(response_dict)
+
+    async def get_email_activations(
+            self, page=1, per_page=10, search=None, sort='desc'
+    ) -> typing.Tuple[EmailActivation, ...]:
+        """
+        Returns currently active email activations.
+        :param page: The page number to get.
+        :param per_page: The number of activations per page.
+        :param search: The mailbox email to search for.
+        :param sort: The sorting order by `id` attribute. `asc` or `desc`.
+        :return: Tuple of currently active email activations.
+        """
+        response_dict = await self._request({
+            'action': 'getMailHistory', 'page': page,
+            'per_page': per_page, 'search': search, 'sort': sort
+        })
+        activations = response_dict.get('list')
+        if activations is None:
+            raise SMSActivateError('Bad response: no list')
+        return tuple(EmailActivation.from_dict(activation, self) for activation in activations)
+
+    async def buy_email_activation(self, from_domain: str, domain: EmailDomain) -> EmailActivation:
+        """
+        Buy a new temporary mailbox.
+        :param from_domain: Domain from which you are expecting to receive an email.
+        :param domain: Domain for your mailbox. You can get it from `get_available_domains` method or construct
+        it manually e.g. `EmailDomain('outlook.com', EmailDomainType.POPULAR)`
+        :return: An `EmailActivation` instance.
+        """
+        response_dict = await self._request({
+            'action': 'buyMailActivation', 'site': from_domain,
+            'mail_type': domain.type.value, 'mail_domain': domain.name
+        })
+        activation_id, email = response_dict.get('id'), response_dict.get('email')
+        if activation_id is None or email is None:
+            raise SMSActivateError(f'Bad activation: {response_dict}')
+        return EmailActivation(id=activation_id, email=email, _client=self)
+
+    async def _get_email_activation_text(
+            self, activation: EmailActivation, period_sec: int = 5, attempts: int = 10
+    ) -> str:
+        params = {'action': 'checkMailActivation', 'id': activation.id}
+        for i in range(attempts):
+            try:
+                response_dict = await self._request(params)
+            except WaitingForMessageError:
+                response_dict = {}
+            if 'full_message' in response_dict:
+                activation.full_message = response_dict['full_message']
+                return response_dict['full_message']
+            if i + 1 < attempts:
+                await asyncio.sleep(_backoff_delay(period_sec, i))
+        raise TimeoutError('Timed out waiting for text')
+
+    async def _reactivate_email_activation(self, activation: EmailActivation) -> bool:
+        response_dict = await self._request({'action': 'reorderMailActivation', 'id': activation.id})
+        activation.__init__(id=response_dict['id'], email=response_dict['email'], _client=self)
+        return True
+
+    async def _cancel_email_activation(self, activation: EmailActivation) -> bool:
+        response_dict = await self._request({'action': 'cancelMailActivation', 'id': activation.id})
+        return response_dict
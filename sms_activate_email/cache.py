@@ -0,0 +1,131 @@
+import collections
+import hashlib
+import os
+import threading
+import time
+import typing
+from concurrent.futures import Future
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-entry expiration and LRU eviction.
+
+    Concurrent loads of the same key are deduplicated: only the first caller runs the loader,
+    the others wait for its result.
+
+    If `path` is given and `msgpack` is installed, entries are also persisted to that directory
+    so they survive across processes. Values must then be msgpack-serializable.
+    """
+    def __init__(
+            self,
+            ttl: float = 300,
+            max_size: int = 128,
+            path: typing.Union[str, None] = None,
+            clock: typing.Callable[[], float] = time.monotonic
+    ):
+        """
+        :param ttl: How long entries are kept, in seconds. `0` disables caching.
+        :param max_size: Maximum number of entries, least recently used entries are evicted first.
+        :param path: Directory to persist entries to.
+        :param clock: Monotonic clock used for in-memory expiration, in seconds.
+        """
+        self._ttl = ttl
+        self._max_size = max_size
+        self._path = path if msgpack is not None else None
+        self._clock = clock
+
+        self._entries = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: typing.Hashable, loader: typing.Callable[[], typing.Any]) -> typing.Any:
+        """
+        Returns a cached value for the key, calling the loader and caching its result on miss.
+        :param key: Cache key.
+        :param loader: Callable producing the value.
+        :return: Cached or freshly loaded value.
+        """
+        if self._ttl <= 0 or self._max_size <= 0:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+            future = self._pending.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = self._pending[key] = Future()
+
+        if not is_loader:
+            return future.result()
+
+        try:
+            value, ttl = self._read_persistent(key)
+            if ttl <= 0:
+                value, ttl = loader(), self._ttl
+                self._write_persistent(key, value)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def _persistent_file(self, key: typing.Hashable) -> str:
+        return os.path.join(self._path, hashlib.sha1(repr(key).encode()).hexdigest() + '.msgpack')
+
+    def _read_persistent(self, key: typing.Hashable) -> typing.Tuple[typing.Any, float]:
+        """
+        Reads an entry persisted on disk.
+        :param key: Cache key.
+        :return: The value and its remaining time to live, which is not positive if there is no fresh entry.
+        """
+        if self._path is None:
+            return None, 0
+        try:
+            with open(self._persistent_file(key), 'rb') as file:
+                entry = msgpack.unpackb(file.read(), raw=False)
+            return entry['value'], entry['expires'] - time.time()
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, 0
+
+    def _write_persistent(self, key: typing.Hashable, value: typing.Any):
+        """
+        Persists an entry on disk, errors are ignored.
+        :param key: Cache key.
+        :param value: Value to persist.
+        """
+        if self._path is None:
+            return
+        file_path = self._persistent_file(key)
+        tmp_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(self._path, exist_ok=True)
+            with open(tmp_path, 'wb') as file:
+                file.write(msgpack.packb({'expires': time.time() + self._ttl, 'value': value}, use_bin_type=True))
+            os.replace(tmp_path, file_path)
+        except (OSError, ValueError, TypeError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -1,20 +1,122 @@
 import enum
 import functools
-import json
+import itertools
+import operator
+import random
 from builtins import type
 from datetime import datetime
 
 import requests
 import time
 import typing
+import urllib.parse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from sms_activate_email.cache import TTLCache
 from sms_activate_email.errors import (
     SMSActivateError, BadAPIKeyError, BadActionError, BadBalanceError,
     BadSiteError, BadDomainError, ChannelsLimitError, ActivationNotFoundError,
     WaitingForMessageError
 )
 
+_ERROR_MAP = {
+    'BAD_KEY': BadAPIKeyError,
+    'BAD_ACTION': BadActionError,
+    'BAD_BALANCE': BadBalanceError,
+    'BAD_SITE': BadSiteError,
+    'BLOCKED_SITE': BadSiteError,
+    'MAIL_TYPE_ERROR': BadDomainError,
+    'CHANNELS_LIMIT': ChannelsLimitError,
+    'ACTIVATION_NOT_FOUND': ActivationNotFoundError,
+    'NO_ACTIVATION': ActivationNotFoundError,
+    'WAIT_LINK': WaitingForMessageError,
+}
+
+
+def _parse_response(status_code: int, content: bytes) -> dict:
+    """
+    Converts raw SMS-Activate response to dictionary and checks for API errors.
+    :param status_code: HTTP status code of the response.
+    :param content: Raw response body.
+    :return: Dictionary with response data.
+    """
+    if status_code != 200:
+        raise SMSActivateError(f'Bad status code: {status_code}')
+
+    try:
+        response_dict = _json.loads(content)
+    except ValueError:
+        raise SMSActivateError(f"Bad json: {content.decode('utf-8', 'replace')}")
+
+    error = _ERROR_MAP.get(response_dict.get('error'))
+    if error is not None:
+        raise error
+
+    status = response_dict.get('status')
+    if status != 'OK':
+        raise SMSActivateError(f'Bad status: {status}')
+
+    return response_dict['response']
+
+
+def _backoff_delay(period_sec: float, attempt: int) -> float:
+    """
+    Returns the delay before the next activation check.
+    The delay grows by 1.5x per attempt up to 30 seconds (or `period_sec` if larger), plus a small jitter.
+    :param period_sec: The delay before the second check.
+    :param attempt: Zero-based number of the check just performed.
+    :return: The delay in seconds.
+    """
+    # Clamp the exponent: the cap is reached long before, and 1.5 ** attempt overflows for large attempts
+    return min(period_sec * 1.5 ** min(attempt, 64), max(period_sec, 30)) + random.random() * 0.25
+
+
+# Incremental parsing is several times slower per row than parsing the whole body at once,
+# so it only pays off in memory for pages this large or larger
+_STREAM_MIN_PER_PAGE = 500
+
+
+def _check_response_events(events: typing.Iterator[tuple], path: str) -> typing.Iterator[tuple]:
+    """
+    Passes through `ijson` parsing events of SMS-Activate response and checks for API errors.
+    A bad status is raised before the array is entered if the status precedes it in the response,
+    otherwise only once the whole response is read.
+    :param events: `ijson` parsing events.
+    :param path: Dotted path to the array inside response data, it must be present.
+    :return: The same parsing events.
+    """
+    array_prefix = f'response.{path}'
+    status = None
+    has_array = False
+    for prefix, event, value in events:
+        if prefix == 'error':
+            error = _ERROR_MAP.get(value)
+            if error is not None:
+                raise error
+        elif prefix == 'status':
+            status = value
+        elif prefix == array_prefix and event == 'start_array':
+            if status is not None and status != 'OK':
+                raise SMSActivateError(f'Bad status: {status}')
+            has_array = True
+        yield prefix, event, value
+
+    if status != 'OK':
+        raise SMSActivateError(f'Bad status: {status}')
+    if not has_array:
+        raise SMSActivateError(f'Bad response: no {path}')
+
 
 class EmailDomainType(enum.Enum):
     """
@@ -39,6 +141,8 @@ class EmailDomain:
     count : int
         the number of available mailboxes in this domain, not applicable for zones type domains
     """
+    __slots__ = ('name', 'type', 'cost', 'count')
+
     name: str
     type: EmailDomainType
     cost: float
@@ -54,6 +158,27 @@ class EmailDomain:
         return f'{self.name}'
 
 
+def _parse_domains(response_dict: dict) -> typing.Tuple[EmailDomain, ...]:
+    """
+    Builds domains from `getDomains` response data.
+    :param response_dict: Dictionary with response data.
+    :return: Tuple of available domains.
+    """
+    return tuple(itertools.chain(
+        (
+            EmailDomain(domain['name'], EmailDomainType.ZONES, domain['cost'], domain.get('count', -1))
+            for domain in response_dict.get('zones', [])
+        ),
+        (
+            EmailDomain(domain['name'], EmailDomainType.POPULAR, domain['cost'], domain.get('count', -1))
+            for domain in response_dict.get('popular', [])
+        )
+    ))
+
+
+_ACTIVATION_GETTER = operator.itemgetter('id', 'email', 'site', 'status', 'value', 'cost', 'date', 'full_message')
+
+
 class EmailActivation:
     """
     Represents a temporary mailbox (email activation).
@@ -75,19 +200,20 @@ class EmailActivation:
     cost : float
         the price of this mailbox
     date : datetime
-        the datetime when the mailbox was created or reactivated
+        the datetime when the mailbox was created or reactivated, parsed from the API string on first access
     full_message : str
         the full message got by this mailbox
     """
+    __slots__ = ('id', 'email', 'site', 'status', 'value', 'cost', '_date', '_date_raw', 'full_message', '_client')
+
     id: int
     email: str
 
-    site: typing.Union[str, None] = None
-    status: typing.Union[int, None] = None
-    value: typing.Union[str, None] = None
-    cost: typing.Union[float, None] = None
-    date: typing.Union[datetime, None] = None
-    full_message: typing.Union[str, None] = None
+    site: typing.Union[str, None]
+    status: typing.Union[int, None]
+    value: typing.Union[str, None]
+    cost: typing.Union[float, None]
+    full_message: typing.Union[str, None]
 
     def __init__(
             self,
@@ -97,8 +223,9 @@ class EmailActivation:
             status: typing.Union[int, None] = None,
             value: typing.Union[str, None] = None,
             cost: typing.Union[float, None] = None,
-            date: typing.Union[datetime, None] = None,
-            full_message: typing.Union[str, None] = None
+            date: typing.Union[datetime, str, None] = None,
+            full_message: typing.Union[str, None] = None,
+            _client=None
     ):
         self.id = id
         self.email = email
@@ -108,29 +235,76 @@ class EmailActivation:
         self.cost = cost
         self.date = date
         self.full_message = full_message
+        self._client = _client
+
+    @classmethod
+    def from_dict(cls, activation: dict, client=None) -> 'EmailActivation':
+        """
+        Builds an activation from an API response row, bypassing `__init__` argument binding.
+        :param activation: Activation data with `id` and `email` keys, other fields are optional.
+        :param client: The client to bind the activation to.
+        :return: An `EmailActivation` instance.
+        """
+        obj = object.__new__(cls)
+        try:
+            # Full rows (as returned by history) are read in a single C-level call
+            (
+                obj.id, obj.email, obj.site, obj.status, obj.value, obj.cost, obj._date_raw, obj.full_message
+            ) = _ACTIVATION_GETTER(activation)
+        except KeyError:
+            obj.id = activation['id']
+            obj.email = activation['email']
+            obj.site = activation.get('site')
+            obj.status = activation.get('status')
+            obj.value = activation.get('value')
+            obj.cost = activation.get('cost')
+            obj._date_raw = activation.get('date')
+            obj.full_message = activation.get('full_message')
+        obj._date = None
+        obj._client = client
+        return obj
+
+    @property
+    def date(self) -> typing.Union[datetime, None]:
+        if self._date is None and self._date_raw:
+            self._date = datetime.fromisoformat(self._date_raw)
+        return self._date
+
+    @date.setter
+    def date(self, date: typing.Union[datetime, str, None]):
+        if isinstance(date, datetime):
+            self._date, self._date_raw = date, None
+        else:
+            self._date, self._date_raw = None, date
 
     def get_text(self, period_sec: int = 5, attempts: int = 10) -> str:
         """
         Returns the text of the message got by this activation.
-        :param period_sec: How much time to wait between activation checks.
+        :param period_sec: How much time to wait between the first activation checks, grows with each attempt.
         :param attempts: How many attempts to perform to get the message.
         :return: The text of the message.
         """
-        raise NotImplemented()
+        if self._client is None:
+            raise SMSActivateError('Activation is not bound to a client')
+        return self._client._get_email_activation_text(self, period_sec, attempts)
 
     def reactivate(self) -> bool:
         """
         Reactivates the mailbox to receive a new message. The `id` attribute will be changed.
         :return: Is the mailbox successfully reactivated.
         """
-        raise NotImplemented()
+        if self._client is None:
+            raise SMSActivateError('Activation is not bound to a client')
+        return self._client._reactivate_email_activation(self)
 
     def cancel(self) -> bool:
         """
         Cancels the mailbox.
         :return: Is the mailbox successfully canceled.
         """
-        raise NotImplemented()
+        if self._client is None:
+            raise SMSActivateError('Activation is not bound to a client')
+        return self._client._cancel_email_activation(self)
 
     def __str__(self):
         return f'#{self.id}: {self.email}'
@@ -140,17 +314,58 @@ class SMSActivateEmailClient:
     """
     Represents an `sms-activate` API client for temporary mailboxes.
     """
-    def __init__(self, api_key: str, base_url: str = 'https://api.sms-activate.org/stubs/handler_api.php'):
+    def __init__(
+            self,
+            api_key: str,
+            base_url: str = 'https://api.sms-activate.org/stubs/handler_api.php',
+            cache_ttl: float = 300,
+            cache_size: int = 128,
+            persistent_cache_path: typing.Union[str, None] = None
+    ):
         """
         :param api_key: Your API key for SMS-Activate.
         :param base_url: API base URL.
+        :param cache_ttl: How long `get_available_domains` results are cached, in seconds. `0` disables caching.
+        :param cache_size: Maximum number of cached `get_available_domains` results.
+        :param persistent_cache_path: Directory to persist `get_available_domains` results to, so they are shared
+        across processes. Requires `msgpack`, ignored if it is not installed.
         """
         self._api_key = api_key
-        self._base_url = base_url
+        # The API key is baked into the URL once, so requests don't merge session params on every call
+        separator = '&' if '?' in base_url else '?'
+        self._base_url = f"{base_url}{separator}{urllib.parse.urlencode({'api_key': api_key})}"
+        self._cache = TTLCache(ttl=cache_ttl, max_size=cache_size, path=persistent_cache_path)
+
+        # Read-only actions are safe to resend, so they are retried on gateway errors and read timeouts
+        self._session = self._create_session(Retry(
+            total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']), raise_on_status=False
+        ))
+        # Actions that buy, reorder or cancel mailboxes are only retried if the request never reached the server
+        self._action_session = self._create_session(Retry(
+            total=3, connect=3, read=0, status=0, other=0, backoff_factor=0.3,
+            allowed_methods=frozenset(['GET']), raise_on_status=False
+        ))
 
-        self._session = requests.Session()
-        self._session.headers = {'User-Agent': 'python-sms-activate-email/0.1'}
-        self._session.params = {'api_key': self._api_key}
+    @staticmethod
+    def _create_session(retries: Retry) -> requests.Session:
+        """
+        Creates an HTTP session for SMS-Activate API.
+        :param retries: Retry policy for the session's requests.
+        :return: Requests session object.
+        """
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'python-sms-activate-email/0.1',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive'
+        })
+
+        # All requests go to a single host, so keep one pool large enough for concurrent polling
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=64, max_retries=retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     @staticmethod
     def _response_to_dict(response: requests.Response) -> dict:
@@ -159,94 +374,83 @@ class SMSActivateEmailClient:
         :param response: Requests response object.
         :return: Dictionary with response data.
         """
-        if response.status_code != 200:
-            raise SMSActivateError('Bad status code: {}'.format(response.status_code))
+        return _parse_response(response.status_code, response.content)
 
-        try:
-            response_dict = response.json()
-        except json.decoder.JSONDecodeError:
-            raise SMSActivateError('Bad json: {}'.format(response.text))
-
-        if 'error' in response_dict:
-            if response_dict['error'] == 'BAD_KEY':
-                raise BadAPIKeyError
-            if response_dict['error'] == 'BAD_ACTION':
-                raise BadActionError
-            if response_dict['error'] == 'BAD_BALANCE':
-                raise BadBalanceError
-            if response_dict['error'] == 'BAD_SITE' or response_dict['error'] == 'BLOCKED_SITE':
-                raise BadSiteError
-            if response_dict['error'] == 'MAIL_TYPE_ERROR':
-                raise BadDomainError
-            if response_dict['error'] == 'CHANNELS_LIMIT':
-                raise ChannelsLimitError
-            if response_dict['error'] == 'ACTIVATION_NOT_FOUND' or response_dict['error'] == 'NO_ACTIVATION':
-                raise ActivationNotFoundError
-            if response_dict['error'] == 'WAIT_LINK':
-                raise WaitingForMessageError
-
-        if response_dict.get('status', None) != 'OK':
-            raise SMSActivateError('Bad status: {}'.format(response_dict.get('status', None)))
-
-        return response_dict['response']
-
-    def get_available_domains(self, from_domain: str) -> typing.List[EmailDomain]:
+    def get_available_domains(self, from_domain: str) -> typing.Tuple[EmailDomain, ...]:
         """
-        Get a list of available domains for temporary mailbox.
+        Get available domains for temporary mailbox.
         :param from_domain: Domain from which you are expecting to receive an email.
-        :return: List of available domains.
+        :return: Tuple of available domains.
         """
+        response_dict = self._cache.get_or_load(
+            ('domains', self._base_url, from_domain), functools.partial(self._get_domains_dict, from_domain)
+        )
+        return _parse_domains(response_dict)
+
+    def _get_domains_dict(self, from_domain: str) -> dict:
         response = self._session.get(self._base_url, params={'action': 'getDomains', 'site': from_domain})
-        response_dict = self._response_to_dict(response)
-        domains = [
-            EmailDomain(
-                domain['name'],
-                EmailDomainType.ZONES,
-                domain['cost'],
-                domain.get('count', -1)
-            ) for domain in response_dict.get('zones', [])
-        ]
-        domains += [
-            EmailDomain(
-                domain['name'],
-                EmailDomainType.POPULAR,
-                domain['cost'],
-                domain.get('count', -1)
-            ) for domain in response_dict.get('popular', [])
-        ]
-        return domains
-
-    def get_email_activations(self, page=1, per_page=10, search=None, sort='desc') -> typing.List[EmailActivation]:
+        return self._response_to_dict(response)
+
+    def get_email_activations(
+            self, page=1, per_page=10, search=None, sort='desc'
+    ) -> typing.Tuple[EmailActivation, ...]:
         """
-        Returns the list of currently active email activations.
+        Returns currently active email activations.
         :param page: The page number to get.
         :param per_page: The number of activations per page.
         :param search: The mailbox email to search for.
         :param sort: The sorting order by `id` attribute. `asc` or `desc`.
-        :return: List of currently active email activations.
+        :return: Tuple of currently active email activations.
         """
         response = self._session.get(self._base_url, params={
             'action': 'getMailHistory', 'page': page,
             'per_page': per_page, 'search': search, 'sort': sort
         })
-        response_dict = self._response_to_dict(response)
-        activations = []
-        for activation in response_dict['list']:
-            activation = EmailActivation(
-                id=activation['id'],
-                email=activation['email'],
-                site=activation['site'],
-                status=activation['status'],
-                value=activation['value'],
-                cost=activation['cost'],
-                date=activation['date'],
-                full_message=activation['full_message']
-            )
-            activation.get_text = functools.partial(self._get_email_activation_text, activation)
-            activation.reactivate = functools.partial(self._reactivate_email_activation, activation)
-            activation.cancel = functools.partial(self._cancel_email_activation, activation)
-            activations.append(activation)
-        return activations
+        activations = self._response_to_dict(response).get('list')
+        if activations is None:
+            raise SMSActivateError('Bad response: no list')
+        return tuple(EmailActivation.from_dict(activation, self) for activation in activations)
+
+    def iter_email_activations(self, page=1, per_page=10, search=None, sort='desc') -> typing.Iterator[EmailActivation]:
+        """
+        Yields currently active email activations.
+        If `ijson` is installed and `per_page` is at least `_STREAM_MIN_PER_PAGE`, the response is parsed while
+        it is being downloaded, which keeps memory usage flat for large pages. In that case an API error reported
+        only after the activations list (e.g. a bad `status` following it) is raised after the last activation
+        was yielded. Smaller pages are parsed at once like in `get_email_activations`, which is faster.
+        :param page: The page number to get.
+        :param per_page: The number of activations per page.
+        :param search: The mailbox email to search for.
+        :param sort: The sorting order by `id` attribute. `asc` or `desc`.
+        :return: Iterator over currently active email activations.
+        """
+        if ijson is None or per_page < _STREAM_MIN_PER_PAGE:
+            yield from self.get_email_activations(page, per_page, search, sort)
+            return
+
+        activations = self._stream_response_items({
+            'action': 'getMailHistory', 'page': page,
+            'per_page': per_page, 'search': search, 'sort': sort
+        }, 'list')
+        for activation in activations:
+            yield EmailActivation.from_dict(activation, self)
+
+    def _stream_response_items(self, params: dict, path: str) -> typing.Iterator[typing.Any]:
+        """
+        Streams items of an array from SMS-Activate response and checks for API errors.
+        :param params: Request query parameters.
+        :param path: Dotted path to the array inside response data.
+        :return: Iterator over array items.
+        """
+        with self._session.get(self._base_url, params=params, stream=True) as response:
+            if response.status_code != 200:
+                raise SMSActivateError(f'Bad status code: {response.status_code}')
+            response.raw.decode_content = True
+            events = _check_response_events(ijson.parse(response.raw, use_float=True), path)
+            try:
+                yield from ijson.items(events, f'response.{path}.item')
+            except ijson.JSONError as e:
+                raise SMSActivateError(f'Bad json: {e}')
 
     def buy_email_activation(self, from_domain: str, domain: EmailDomain) -> EmailActivation:
         """
@@ -256,34 +460,43 @@ class SMSActivateEmailClient:
         it manually e.g. `EmailDomain('outlook.com', EmailDomainType.POPULAR)`
         :return: An `EmailActivation` instance.
         """
-        response = self._session.get(self._base_url, params={
+        response = self._action_session.get(self._base_url, params={
             'action': 'buyMailActivation', 'site': from_domain,
             'mail_type': domain.type.value, 'mail_domain': domain.name
         })
         response_dict = self._response_to_dict(response)
-        activation = EmailActivation(id=response_dict['id'], email=response_dict['email'])
-        activation.get_text = functools.partial(self._get_email_activation_text, activation)
-        activation.reactivate = functools.partial(self._reactivate_email_activation, activation)
-        activation.cancel = functools.partial(self._cancel_email_activation, activation)
-        return activation
+        activation_id, email = response_dict.get('id'), response_dict.get('email')
+        if activation_id is None or email is None:
+            raise SMSActivateError(f'Bad activation: {response_dict}')
+        return EmailActivation(id=activation_id, email=email, _client=self)
 
     def _get_email_activation_text(self, activation: EmailActivation, period_sec: int = 5, attempts: int = 10) -> str:
+        # Every check is the same request, so prepare it once; this loop is the hot path while waiting for a message
+        session, to_dict = self._session, self._response_to_dict
+        request = session.prepare_request(requests.Request(
+            'GET', self._base_url, params={'action': 'checkMailActivation', 'id': activation.id}
+        ))
+        send_kwargs = session.merge_environment_settings(request.url, {}, None, None, None)
         for i in range(attempts):
-            response = self._session.get(self._base_url, params={'action': 'checkMailActivation', 'id': activation.id})
-            response_dict = self._response_to_dict(response)
+            response = session.send(request, **send_kwargs)
+            try:
+                response_dict = to_dict(response)
+            except WaitingForMessageError:
+                response_dict = {}
             if 'full_message' in response_dict:
                 activation.full_message = response_dict['full_message']
                 return response_dict['full_message']
-            time.sleep(period_sec)
+            if i + 1 < attempts:
+                time.sleep(_backoff_delay(period_sec, i))
         raise TimeoutError('Timed out waiting for text')
 
     def _reactivate_email_activation(self, activation: EmailActivation) -> bool:
-        response = self._session.get(self._base_url, params={'action': 'reorderMailActivation', 'id': activation.id})
+        response = self._action_session.get(self._base_url, params={'action': 'reorderMailActivation', 'id': activation.id})
         response_dict = self._response_to_dict(response)
-        activation.__init__(id=response_dict['id'], email=response_dict['email'])
+        activation.__init__(id=response_dict['id'], email=response_dict['email'], _client=self)
         return True
 
     def _cancel_email_activation(self, activation: EmailActivation) -> bool:
-        response = self._session.get(self._base_url, params={'action': 'cancelMailActivation', 'id': activation.id})
+        response = self._action_session.get(self._base_url, params={'action': 'cancelMailActivation', 'id': activation.id})
         response_dict = self._response_to_dict(response)
         return response_dict
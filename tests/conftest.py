@@ -0,0 +1,67 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class ApiServer:
+    """
+    Local stand-in for the SMS-Activate API.
+
+    Responses are queued per action as `(status_code, body)` pairs, the last one is repeated.
+    """
+    def __init__(self):
+        self.requests = []
+        self.queries = []
+        self.responses = {}
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f'http://127.0.0.1:{self._server.server_port}/handler_api.php'
+
+    def respond(self, action, *responses):
+        self.responses[action] = list(responses)
+
+    def actions(self):
+        return [params.get('action') for params in self.requests]
+
+    def _next_response(self, action):
+        queue = self.responses.get(action) or [(200, {'status': 'ERROR', 'error': 'BAD_ACTION'})]
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    def _handler(self):
+        api_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = urlparse(self.path).query
+                params = {key: value[0] for key, value in parse_qs(query).items()}
+                api_server.queries.append(query)
+                api_server.requests.append(params)
+                status_code, body = api_server._next_response(params.get('action'))
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def api_server():
+    server = ApiServer()
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from sms_activate_email import async_client
+from sms_activate_email.async_client import AsyncSMSActivateEmailClient
+from sms_activate_email.client import EmailDomain, EmailDomainType
+from sms_activate_email.errors import BadAPIKeyError, SMSActivateError
+
+pytest.importorskip('aiohttp')
+
+ACTIVATION = {'status': 'OK', 'response': {'id': 1, 'email': 'box@outlook.com'}}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(async_client, '_backoff_delay', lambda period_sec, attempt: 0)
+
+
+def run(api_server, scenario):
+    async def main():
+        async with AsyncSMSActivateEmailClient('KEY', base_url=api_server.url) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+
+def test_domains_are_parsed(api_server):
+    api_server.respond('getDomains', (200, {
+        'status': 'OK', 'response': {'zones': [{'name': 'xyz', 'cost': 1}], 'popular': [{'name': 'a.com', 'cost': 2}]}
+    }))
+    domains = run(api_server, lambda client: client.get_available_domains('site.com'))
+    assert [(domain.name, domain.type) for domain in domains] == [
+        ('xyz', EmailDomainType.ZONES), ('a.com', EmailDomainType.POPULAR)
+    ]
+    assert api_server.requests == [{'action': 'getDomains', 'site': 'site.com', 'api_key': 'KEY'}]
+
+
+def test_none_params_are_skipped(api_server):
+    api_server.respond('getMailHistory', (200, {'status': 'OK', 'response': {'list': []}}))
+    assert run(api_server, lambda client: client.get_email_activations()) == ()
+    assert 'search' not in api_server.requests[0]
+
+
+def test_get_text_polls_until_message(api_server):
+    api_server.respond('buyMailActivation', (200, ACTIVATION))
+    api_server.respond(
+        'checkMailActivation',
+        (200, {'status': 'ERROR', 'error': 'WAIT_LINK'}),
+        (200, {'status': 'OK', 'response': {}}),
+        (200, {'status': 'OK', 'response': {'full_message': 'hello'}})
+    )
+
+    async def scenario(client):
+        activation = await client.buy_email_activation(
+            'site.com', EmailDomain('outlook.com', EmailDomainType.POPULAR)
+        )
+        return activation, await activation.get_text(period_sec=0, attempts=5)
+
+    activation, text = run(api_server, scenario)
+    assert text == activation.full_message == 'hello'
+    assert api_server.actions().count('checkMailActivation') == 3
+
+
+def test_get_text_times_out(api_server):
+    api_server.respond('buyMailActivation', (200, ACTIVATION))
+    api_server.respond('checkMailActivation', (200, {'status': 'OK', 'response': {}}))
+
+    async def scenario(client):
+        activation = await client.buy_email_activation(
+            'site.com', EmailDomain('outlook.com', EmailDomainType.POPULAR)
+        )
+        await activation.get_text(period_sec=0, attempts=2)
+
+    with pytest.raises(TimeoutError):
+        run(api_server, scenario)
+    assert api_server.actions().count('checkMailActivation') == 2
+
+
+def test_api_error_is_mapped(api_server):
+    api_server.respond('getDomains', (200, {'status': 'ERROR', 'error': 'BAD_KEY'}))
+    with pytest.raises(BadAPIKeyError):
+        run(api_server, lambda client: client.get_available_domains('site.com'))
+
+
+def test_bad_activation_response_raises(api_server):
+    api_server.respond('buyMailActivation', (200, {'status': 'OK', 'response': {'id': 1}}))
+    with pytest.raises(SMSActivateError, match='Bad activation'):
+        run(api_server, lambda client: client.buy_email_activation(
+            'site.com', EmailDomain('outlook.com', EmailDomainType.POPULAR)
+        ))
+
+
+def test_close_releases_session(api_server):
+    api_server.respond('getDomains', (200, {'status': 'OK', 'response': {}}))
+
+    async def main():
+        client = AsyncSMSActivateEmailClient('KEY', base_url=api_server.url)
+        await client.get_available_domains('site.com')
+        session = client._session
+        await client.close()
+        return session, client._session
+
+    session, current = asyncio.run(main())
+    assert session.closed
+    assert current is None
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from sms_activate_email.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def counting_loader(value):
+    calls = []
+
+    def loader():
+        calls.append(value)
+        return value
+    return loader, calls
+
+
+def test_hit_does_not_call_loader(clock):
+    ttl_cache = TTLCache(ttl=10, clock=clock)
+    loader, calls = counting_loader('a')
+    assert ttl_cache.get_or_load('key', loader) == 'a'
+    assert ttl_cache.get_or_load('key', loader) == 'a'
+    assert calls == ['a']
+
+
+def test_entry_expires_after_ttl(clock):
+    ttl_cache = TTLCache(ttl=10, clock=clock)
+    loader, calls = counting_loader('a')
+    ttl_cache.get_or_load('key', loader)
+    clock.now += 9.9
+    ttl_cache.get_or_load('key', loader)
+    assert calls == ['a']
+    clock.now += 0.1
+    ttl_cache.get_or_load('key', loader)
+    assert calls == ['a', 'a']
+
+
+def test_zero_ttl_disables_caching(clock):
+    ttl_cache = TTLCache(ttl=0, clock=clock)
+    loader, calls = counting_loader('a')
+    ttl_cache.get_or_load('key', loader)
+    ttl_cache.get_or_load('key', loader)
+    assert calls == ['a', 'a']
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = TTLCache(ttl=10, max_size=2, clock=clock)
+    ttl_cache.get_or_load('a', lambda: 'a')
+    ttl_cache.get_or_load('b', lambda: 'b')
+    ttl_cache.get_or_load('a', lambda: pytest.fail('a should be cached'))
+    ttl_cache.get_or_load('c', lambda: 'c')
+
+    loader, calls = counting_loader('b')
+    ttl_cache.get_or_load('b', loader)
+    assert calls == ['b']
+    ttl_cache.get_or_load('c', lambda: pytest.fail('c should be cached'))
+
+
+def test_concurrent_loads_are_deduplicated():
+    ttl_cache = TTLCache(ttl=10)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(ttl_cache.get_or_load('key', loader)))
+        for _ in range(5)
+    ]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ['value'] * 5
+
+
+def test_loader_exception_propagates_to_waiters():
+    ttl_cache = TTLCache(ttl=10)
+    started, release = threading.Event(), threading.Event()
+
+    def failing_loader():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    errors = []
+
+    def load():
+        try:
+            ttl_cache.get_or_load('key', failing_loader)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert all(str(e) == 'boom' for e in errors)
+
+
+def test_failed_load_is_not_cached():
+    ttl_cache = TTLCache(ttl=10)
+
+    def failing_loader():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        ttl_cache.get_or_load('key', failing_loader)
+    assert ttl_cache.get_or_load('key', lambda: 'value') == 'value'
@@ -0,0 +1,131 @@
+from datetime import datetime
+
+import pytest
+
+from sms_activate_email import client as client_module
+from sms_activate_email.client import (
+    SMSActivateEmailClient, EmailActivation, EmailDomain, EmailDomainType, _backoff_delay
+)
+from sms_activate_email.errors import SMSActivateError
+
+DOMAINS = {'status': 'OK', 'response': {'zones': [{'name': 'xyz', 'cost': 1}], 'popular': []}}
+ACTIVATION = {'status': 'OK', 'response': {'id': 1, 'email': 'box@outlook.com'}}
+UNAVAILABLE = (503, b'')
+
+
+@pytest.fixture
+def client(api_server):
+    return SMSActivateEmailClient('KEY', base_url=api_server.url, cache_ttl=0)
+
+
+def test_read_only_action_is_retried_on_gateway_error(client, api_server):
+    api_server.respond('getDomains', UNAVAILABLE, (200, DOMAINS))
+    assert [domain.name for domain in client.get_available_domains('site.com')] == ['xyz']
+    assert api_server.actions() == ['getDomains', 'getDomains']
+
+
+def test_buy_is_not_resent_on_gateway_error(client, api_server):
+    api_server.respond('buyMailActivation', UNAVAILABLE, (200, ACTIVATION))
+    with pytest.raises(SMSActivateError):
+        client.buy_email_activation('site.com', EmailDomain('outlook.com', EmailDomainType.POPULAR))
+    assert api_server.actions() == ['buyMailActivation']
+
+
+def test_reorder_is_not_resent_on_gateway_error(client, api_server):
+    api_server.respond('buyMailActivation', (200, ACTIVATION))
+    api_server.respond('reorderMailActivation', UNAVAILABLE, (200, ACTIVATION))
+    activation = client.buy_email_activation('site.com', EmailDomain('outlook.com', EmailDomainType.POPULAR))
+    with pytest.raises(SMSActivateError):
+        activation.reactivate()
+    assert api_server.actions() == ['buyMailActivation', 'reorderMailActivation']
+
+
+def test_activation_date_is_parsed_on_access():
+    activation = EmailActivation.from_dict({'id': 1, 'email': 'box@outlook.com', 'date': '2023-10-11 12:34:56'})
+    assert activation.date == datetime(2023, 10, 11, 12, 34, 56)
+
+
+@pytest.mark.parametrize('date', [None, ''])
+def test_missing_activation_date_is_none(date):
+    activation = EmailActivation.from_dict({'id': 1, 'email': 'box@outlook.com', 'date': date})
+    assert activation.date is None
+
+
+def test_persistent_cache_is_shared_only_by_matching_clients(api_server, tmp_path):
+    pytest.importorskip('msgpack')
+    api_server.respond('getDomains', (200, DOMAINS))
+
+    def make_client(api_key):
+        return SMSActivateEmailClient(api_key, base_url=api_server.url, persistent_cache_path=str(tmp_path))
+
+    make_client('KEY').get_available_domains('site.com')
+    make_client('KEY').get_available_domains('site.com')
+    assert api_server.actions() == ['getDomains']
+
+    make_client('OTHER_KEY').get_available_domains('site.com')
+    assert api_server.actions() == ['getDomains', 'getDomains']
+
+
+@pytest.mark.parametrize('period_sec, attempt, low, high', [
+    (5, 0, 5, 5.25),
+    (5, 1, 7.5, 7.75),
+    (5, 100, 30, 30.25),
+    (5, 5000, 30, 30.25),
+    (60, 5000, 60, 60.25),
+])
+def test_backoff_delay_is_capped(period_sec, attempt, low, high):
+    assert low <= _backoff_delay(period_sec, attempt) <= high
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(client_module, '_backoff_delay', lambda period_sec, attempt: 0)
+
+
+def buy(client, api_server):
+    api_server.respond('buyMailActivation', (200, ACTIVATION))
+    return client.buy_email_activation('site.com', EmailDomain('outlook.com', EmailDomainType.POPULAR))
+
+
+def test_get_text_polls_until_message(client, api_server, no_backoff):
+    activation = buy(client, api_server)
+    api_server.respond(
+        'checkMailActivation',
+        (200, {'status': 'ERROR', 'error': 'WAIT_LINK'}),
+        (200, {'status': 'OK', 'response': {}}),
+        (200, {'status': 'OK', 'response': {'full_message': 'hello'}})
+    )
+    assert activation.get_text(period_sec=0, attempts=5) == 'hello'
+    assert activation.full_message == 'hello'
+    assert api_server.actions().count('checkMailActivation') == 3
+
+
+def test_get_text_times_out_after_attempts(client, api_server, no_backoff):
+    activation = buy(client, api_server)
+    api_server.respond('checkMailActivation', (200, {'status': 'OK', 'response': {}}))
+    with pytest.raises(TimeoutError):
+        activation.get_text(period_sec=0, attempts=4)
+    assert api_server.actions().count('checkMailActivation') == 4
+
+
+def test_get_text_polls_carry_key_and_id(client, api_server, no_backoff):
+    activation = buy(client, api_server)
+    api_server.respond('checkMailActivation', (200, {'status': 'ERROR', 'error': 'WAIT_LINK'}))
+    with pytest.raises(TimeoutError):
+        activation.get_text(period_sec=0, attempts=3)
+    polls = [params for params in api_server.requests if params.get('action') == 'checkMailActivation']
+    assert polls == [{'api_key': 'KEY', 'action': 'checkMailActivation', 'id': '1'}] * 3
+
+
+def test_api_key_is_sent_once_and_url_encoded(api_server):
+    api_server.respond('getDomains', (200, DOMAINS))
+    SMSActivateEmailClient('K&Y =1', base_url=api_server.url, cache_ttl=0).get_available_domains('site.com')
+    assert api_server.queries == ['api_key=K%26Y+%3D1&action=getDomains&site=site.com']
+    assert api_server.requests[0]['api_key'] == 'K&Y =1'
+
+
+def test_api_key_is_appended_to_existing_query(api_server):
+    api_server.respond('getDomains', (200, DOMAINS))
+    client = SMSActivateEmailClient('KEY', base_url=f'{api_server.url}?lang=en', cache_ttl=0)
+    client.get_available_domains('site.com')
+    assert api_server.queries == ['lang=en&api_key=KEY&action=getDomains&site=site.com']
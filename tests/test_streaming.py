@@ -0,0 +1,106 @@
+import io
+
+import pytest
+
+from sms_activate_email import client as client_module
+from sms_activate_email.client import SMSActivateEmailClient, _check_response_events
+from sms_activate_email.errors import SMSActivateError, BadAPIKeyError
+
+ijson = pytest.importorskip('ijson')
+
+ROW = {
+    'id': 1, 'email': 'box@outlook.com', 'site': 'site.com', 'status': 1,
+    'value': None, 'cost': 1.5, 'date': '2023-10-11 12:34:56', 'full_message': None
+}
+
+
+@pytest.fixture(params=['streaming', 'eager'])
+def client(request, api_server, monkeypatch):
+    if request.param == 'streaming':
+        monkeypatch.setattr(client_module, '_STREAM_MIN_PER_PAGE', 0)
+    else:
+        monkeypatch.setattr(client_module, 'ijson', None)
+    return SMSActivateEmailClient('KEY', base_url=api_server.url)
+
+
+def no_streaming(*args):
+    pytest.fail('response should not be streamed')
+
+
+def test_get_email_activations_is_never_streamed(api_server, monkeypatch):
+    monkeypatch.setattr(client_module, '_STREAM_MIN_PER_PAGE', 0)
+    monkeypatch.setattr(SMSActivateEmailClient, '_stream_response_items', no_streaming)
+    api_server.respond('getMailHistory', (200, {'status': 'OK', 'response': {'list': [ROW]}}))
+    client = SMSActivateEmailClient('KEY', base_url=api_server.url)
+    assert [activation.id for activation in client.get_email_activations(per_page=1000)] == [1]
+
+
+def test_small_pages_are_not_streamed(api_server, monkeypatch):
+    monkeypatch.setattr(SMSActivateEmailClient, '_stream_response_items', no_streaming)
+    api_server.respond('getMailHistory', (200, {'status': 'OK', 'response': {'list': [ROW]}}))
+    client = SMSActivateEmailClient('KEY', base_url=api_server.url)
+    per_page = client_module._STREAM_MIN_PER_PAGE - 1
+    assert [activation.id for activation in client.iter_email_activations(per_page=per_page)] == [1]
+
+
+def test_activations_are_parsed(client, api_server):
+    api_server.respond('getMailHistory', (200, {'status': 'OK', 'response': {'list': [ROW, dict(ROW, id=2)]}}))
+    activations = tuple(client.iter_email_activations())
+    assert [activation.id for activation in activations] == [1, 2]
+    assert activations[0].cost == 1.5
+    assert type(activations[0].cost) is float
+
+
+def test_missing_list_raises(client, api_server):
+    api_server.respond('getMailHistory', (200, {'status': 'OK', 'response': {}}))
+    with pytest.raises(SMSActivateError, match='no list'):
+        tuple(client.iter_email_activations())
+
+
+def test_api_error_is_mapped(client, api_server):
+    api_server.respond('getMailHistory', (200, {'status': 'ERROR', 'error': 'BAD_KEY'}))
+    with pytest.raises(BadAPIKeyError):
+        tuple(client.iter_email_activations())
+
+
+def test_bad_status_before_list_yields_no_rows(client, api_server):
+    api_server.respond('getMailHistory', (200, {'status': 'ERROR', 'response': {'list': [ROW]}}))
+    rows = []
+    with pytest.raises(SMSActivateError, match='Bad status'):
+        for activation in client.iter_email_activations():
+            rows.append(activation)
+    assert rows == []
+
+
+def test_bad_http_status_raises(client, api_server):
+    api_server.respond('getMailHistory', (500, b''))
+    with pytest.raises(SMSActivateError, match='Bad status code'):
+        tuple(client.iter_email_activations())
+
+
+def events(body):
+    return list(_check_response_events(ijson.parse(io.BytesIO(body), use_float=True), 'list'))
+
+
+def test_events_pass_through_for_ok_response():
+    assert ('response.list.item.id', 'number', 1) in events(b'{"status": "OK", "response": {"list": [{"id": 1}]}}')
+
+
+def test_events_raise_bad_status_after_list_at_the_end():
+    checked = _check_response_events(
+        ijson.parse(io.BytesIO(b'{"response": {"list": [{"id": 1}]}, "status": "ERROR"}')), 'list'
+    )
+    items = ijson.items(checked, 'response.list.item')
+    assert next(items) == {'id': 1}
+    with pytest.raises(SMSActivateError, match='Bad status: ERROR'):
+        next(items)
+
+
+def test_events_raise_on_missing_status():
+    with pytest.raises(SMSActivateError, match='Bad status: None'):
+        events(b'{"response": {"list": []}}')
+
+
+def test_events_raise_on_missing_array():
+    with pytest.raises(SMSActivateError, match='no list'):
+        events(b'{"status": "OK", "response": {"list": null}}')